@@ -1,17 +1,54 @@
 from typing import Optional, TypedDict
-import yaml
 import os
-from rich.console import Console
-import subprocess
+import stat
 import argparse
-import hashlib
+import functools
 import sys
 
+_console = None
+
 
 def get_myself_path():
     return os.path.abspath(sys.argv[0]) if hasattr(sys, "frozen") else __file__
 
 
+def stat_regular_file(path: str) -> Optional[os.stat_result]:
+    """
+    Stat a path once and return the result only if it is a regular file.
+
+    Args:
+        path (str): The path to be checked.
+    """
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    return st if stat.S_ISREG(st.st_mode) else None
+
+
+def get_console():
+    # rich is heavy to import, so it is only loaded once something is printed.
+    global _console
+    if _console is None:
+        from rich.console import Console
+
+        _console = Console()
+    return _console
+
+
+@functools.lru_cache(maxsize=None)
+def get_prompt(markup: str):
+    """
+    Parse a static prompt markup string once and return the cached rich Text.
+
+    Args:
+        markup (str): The rich markup of the prompt.
+    """
+    from rich.text import Text
+
+    return Text.from_markup(markup)
+
+
 class Option(TypedDict):
     flag: str
     value: any
@@ -31,11 +68,24 @@ class Config(TypedDict):
 
 
 class StartupChecker:
+    _OK_FMT = "[[green]  OK  [/green]] {}"
+    _NG_FMT = "[[red]  NG  [/red]] {}"
+
     def __init__(self, args: argparse.Namespace) -> None:
         self.args = args
         self.result = None
+        self.config_stat = None
         self.check_config()
         self.config = self.load_config()
+        from hashlib import sha256
+
+        self.command_hashes = [
+            sha256(str(command["title"]).encode()).hexdigest()[0:8]
+            for command in self.config["commands"]
+        ]
+        self.title_hashes = {}
+        for command_hash, command in zip(self.command_hashes, self.config["commands"]):
+            self.title_hashes.setdefault(command_hash, command)
         self.check_args()
         self.check_ffmpeg_executable()
 
@@ -47,16 +97,17 @@ class StartupChecker:
             message (str): The message to be printed.
             is_ok (bool): A boolean indicating whether the check passed or not.
         """
-        Console().print(
-            f"[[{'green' if is_ok else 'red'}]{'  OK  ' if is_ok else '  NG  '}[/{'green' if is_ok else 'red'}]] {message}"
-        )
+        get_console().print((self._OK_FMT if is_ok else self._NG_FMT).format(message))
 
     def check_config(self):
         """
         Check if the config.yaml file exists. If not, create it and print a message.
         If it exists, print a message indicating that it was found.
         """
-        if not os.path.isfile(os.path.join(os.path.dirname(get_myself_path()), "config.yaml")):
+        self.config_stat = stat_regular_file(
+            os.path.join(os.path.dirname(get_myself_path()), "config.yaml")
+        )
+        if self.config_stat is None:
             self.create_config()
             self.__print_check_message(
                 f"config.yaml not found. -> created at {os.path.join(os.path.dirname(get_myself_path()), 'config.yaml')}",
@@ -68,7 +119,11 @@ class StartupChecker:
             self.result = True
 
     def create_config(self):
-        with open(os.path.join(os.path.dirname(get_myself_path()), "config.yaml"), "w") as f:
+        import yaml
+
+        with open(
+            os.path.join(os.path.dirname(get_myself_path()), "config.yaml"), "wb", buffering=65536
+        ) as f:
             yaml.dump(
                 {
                     "ffmpeg_path": "/usr/bin/ffmpeg",
@@ -92,16 +147,66 @@ class StartupChecker:
                     ],
                 },
                 f,
+                Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper),
+                encoding="utf-8",
                 default_flow_style=False,
             )
 
     def load_config(self):
-        with open(os.path.join(os.path.dirname(get_myself_path()), "config.yaml"), "r") as f:
-            return yaml.load(f, Loader=yaml.FullLoader)
+        """
+        Load config.yaml. The parsed result is cached next to it as config.yaml.cache
+        together with the mtime and size of config.yaml, and reused only while both
+        still match.
+        """
+        import pickle
+        import tempfile
+
+        config_path = os.path.join(os.path.dirname(get_myself_path()), "config.yaml")
+        cache_path = config_path + ".cache"
+        st = self.config_stat if self.config_stat is not None else os.stat(config_path)
+        try:
+            with open(cache_path, "rb") as f:
+                cached_mtime_ns, cached_size, cached_config = pickle.load(f)
+            if cached_mtime_ns == st.st_mtime_ns and cached_size == st.st_size:
+                return cached_config
+        except Exception:
+            # The cache is disposable; any failure to read it is just a cache miss.
+            pass
+
+        import yaml
+
+        with open(config_path, "rb") as f:
+            data = f.read()
+        config = yaml.load(data, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+        # Write to a temporary file and rename it so concurrent runs never read a
+        # half-written cache.
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(
+                "wb", dir=os.path.dirname(cache_path), prefix="config.yaml.cache.", delete=False
+            ) as f:
+                tmp_path = f.name
+                pickle.dump(
+                    (st.st_mtime_ns, st.st_size, config), f, protocol=pickle.HIGHEST_PROTOCOL
+                )
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+        return config
 
     def get_config(self) -> Config:
         return self.config
 
+    def get_hash_map(self) -> dict[str, Command]:
+        return self.title_hashes
+
+    def get_command_hashes(self) -> list[str]:
+        return self.command_hashes
+
     def check_args(self):
         if self.args.hash is not None and self.args.input_path is None:
             self.__print_check_message(
@@ -114,12 +219,9 @@ class StartupChecker:
             )
             self.result = False
         elif self.args.hash is not None and self.args.input_path is not None:
-            if self.args.hash in [
-                hashlib.sha256(str(command["title"]).encode()).hexdigest()[0:8]
-                for command in self.config["commands"]
-            ]:
+            if self.args.hash in self.title_hashes:
                 self.__print_check_message(
-                    f"Hash {self.args.hash} found. Command title is [dodger_blue1]{[command['title'] for command in self.config['commands'] if hashlib.sha256(str(command['title']).encode()).hexdigest()[0:8] == self.args.hash][0]}[/dodger_blue1]",
+                    f"Hash {self.args.hash} found. Command title is [dodger_blue1]{self.title_hashes[self.args.hash]['title']}[/dodger_blue1]",
                     True,
                 )
                 self.result = True
@@ -131,7 +233,7 @@ class StartupChecker:
             self.result = True
 
     def check_ffmpeg_executable(self):
-        if not os.path.isfile(self.config["ffmpeg_path"]):
+        if stat_regular_file(self.config["ffmpeg_path"]) is None:
             self.__print_check_message(
                 f"ffmpeg executable not found at {self.config['ffmpeg_path']}", False
             )
@@ -144,14 +246,27 @@ class StartupChecker:
 
 
 class Runner:
-    def __init__(self, config: Config, args: argparse.Namespace) -> None:
+    _SYS_FMT = "[[yellow]SYSTEM[/yellow]] {}"
+    _USER_FMT = "[[blue] USER [/blue]] {}"
+
+    def __init__(
+        self,
+        config: Config,
+        args: argparse.Namespace,
+        title_hashes: dict[str, Command],
+        command_hashes: list[str],
+    ) -> None:
         self.config = config
         self.args = args
+        self.title_hashes = title_hashes
+        self.command_hashes = command_hashes
 
     def __print_message(self, message: str, is_from_system: bool):
-        Console().print(
-            f"[[{'yellow' if is_from_system else 'blue'}]{'SYSTEM' if is_from_system else ' USER '}[/{'yellow' if is_from_system else 'blue'}]] {message}"
-        )
+        get_console().print((self._SYS_FMT if is_from_system else self._USER_FMT).format(message))
+
+    def __print_lines(self, lines: list[str]):
+        if lines:
+            get_console().print("\n".join(lines))
 
     def run(self):
         if self.args.config:
@@ -159,7 +274,7 @@ class Runner:
                 f"config.yaml path is {os.path.join(os.path.dirname(get_myself_path()), 'config.yaml')}",
                 True,
             )
-            Console().print(self.config)
+            get_console().print(self.config)
             sys.exit(0)
         command: Command = self.__choose_command()
         input_path: str = self.__ask_input_path()
@@ -173,21 +288,20 @@ class Runner:
 
     def __choose_command(self) -> Command:
         if self.args.hash is not None and self.args.input_path is not None:
-            for command in self.config["commands"]:
-                if (
-                    hashlib.sha256(str(command["title"]).encode()).hexdigest()[0:8]
-                    == self.args.hash
-                ):
-                    return command
+            command = self.title_hashes.get(self.args.hash)
+            if command is not None:
+                return command
             self.__print_message("Hash not found.", True)
             sys.exit(1)
         else:
             self.__print_message("Choose a command.", True)
-            for i, command in enumerate(self.config["commands"]):
-                Console().print(
-                    f"    [green]{i}[/green]: {command['title']} [dodger_blue1](Hash: {hashlib.sha256(str(command['title']).encode()).hexdigest()[0:8]})[/dodger_blue1]"
-                )
-            choice = int(Console().input("[green]Choice > [/green]"))
+            self.__print_lines(
+                [
+                    f"    [green]{i}[/green]: {command['title']} [dodger_blue1](Hash: {self.command_hashes[i]})[/dodger_blue1]"
+                    for i, command in enumerate(self.config["commands"])
+                ]
+            )
+            choice = int(get_console().input(get_prompt("[green]Choice > [/green]")))
             self.__print_message(
                 f"Chosen command: {self.config['commands'][choice]['title']}", False
             )
@@ -199,92 +313,87 @@ class Runner:
             return self.args.input_path
         else:
             self.__print_message("Input the path of the video file.", True)
-            input_path = Console().input("[green]Input path > [/green]")
+            input_path = get_console().input(get_prompt("[green]Input path > [/green]"))
             self.__print_message(f"Input path: {input_path}", False)
             print()
             return input_path
 
     def __modify_options(self, options: list[Option]) -> list[Option]:
-        self.__print_message("Options are below. Is it OK?", True)
-        for i, option in enumerate(options):
-            Console().print(f"    {option['flag']} {option['value']}")
-        choice = Console().input("[green]y/n > [/green]")
+        while True:
+            self.__print_message("Options are below. Is it OK?", True)
+            self.__print_lines([f"    {option['flag']} {option['value']}" for option in options])
+            choice = get_console().input(get_prompt("[green]y/n > [/green]"))
+            if choice != "n":
+                return options
 
-        if choice == "n":
             self.__print_message("Choose option you want to modify.", True)
-            for i, option in enumerate(options):
-                Console().print(f"    [green]{i}[/green]: {option['flag']} {option['value']}")
-            choice = int(Console().input("[green]Choice > [/green]"))
+            self.__print_lines(
+                [
+                    f"    [green]{i}[/green]: {option['flag']} {option['value']}"
+                    for i, option in enumerate(options)
+                ]
+            )
+            choice = int(get_console().input(get_prompt("[green]Choice > [/green]")))
             self.__print_message(
                 f"Chosen option: {options[choice]['flag']} {options[choice]['value']}",
                 False,
             )
             self.__print_message("Input new value.", True)
-            new_value = Console().input("[green]New value > [/green]")
+            new_value = get_console().input(get_prompt("[green]New value > [/green]"))
             self.__print_message(f"New value: {new_value}", False)
             options[choice]["value"] = new_value
 
-            self.__modify_options(options)
-        return options
-
     def __gen_output_path(self, command: Command, input_path: str) -> str:
+        default_path = os.path.join(
+            os.getcwd(),
+            f"{os.path.splitext(input_path)[0]}{command['output_filename_suffix']}{command['output_extension']}",
+        )
         if self.args.hash is not None and self.args.input_path is not None:
-            return os.path.join(
-                os.getcwd(),
-                f"{os.path.splitext(input_path)[0]}{command['output_filename_suffix']}{command['output_extension']}",
-            )
+            return default_path
         else:
             print()
-            self.__print_message(
-                "Current output path is: "
-                + os.path.join(
-                    os.getcwd(),
-                    f"{os.path.splitext(input_path)[0]}{command['output_filename_suffix']}{command['output_extension']}",
-                ),
-                True,
-            )
+            self.__print_message(f"Current output path is: {default_path}", True)
             self.__print_message("Is it OK?", True)
-            choice = Console().input("[green]y/n > [/green]")
+            choice = get_console().input(get_prompt("[green]y/n > [/green]"))
             if choice == "n":
                 self.__print_message("Input new output path.", True)
-                output_path = Console().input("[green]Output path: [/green]")
+                output_path = get_console().input(get_prompt("[green]Output path: [/green]"))
                 self.__print_message(f"Output path: {output_path}", False)
                 return output_path
             else:
-                return os.path.join(
-                    os.getcwd(),
-                    f"{os.path.splitext(input_path)[0]}{command['output_filename_suffix']}{command['output_extension']}",
-                )
+                return default_path
 
     def __execute_command(
         self, command: Command, input_path: str, options: list[Option], output_path: str
     ):
+        import shlex
+        import subprocess
+
+        flat_options = [
+            str(value) for option in options for value in (option["flag"], option["value"])
+        ]
         if self.args.hash is not None and self.args.input_path is not None:
             self.__print_message("Executing command...", True)
             subprocess.run(
-                [
-                    self.config["ffmpeg_path"],
-                    "-i",
-                    input_path,
-                    " ".join([f"{option['flag']} {option['value']}" for option in options]),
-                    output_path,
-                ]
+                [self.config["ffmpeg_path"], "-i", input_path, *flat_options, output_path]
             )
             self.__print_message("Done.", True)
             sys.exit(0)
         else:
             print()
-            command_list = command["command"]
-            command_list[command_list.index("{{ffmpeg_path}}")] = self.config["ffmpeg_path"]
-            command_list[command_list.index("{{input_path}}")] = input_path
-            command_list[command_list.index("{{output_path}}")] = output_path
-            command_list[command_list.index("{{options}}")] = " ".join(
-                [f"{option['flag']} {option['value']}" for option in options]
-            )
+            subs = {
+                "{{ffmpeg_path}}": [self.config["ffmpeg_path"]],
+                "{{input_path}}": [input_path],
+                "{{output_path}}": [output_path],
+                "{{options}}": flat_options,
+            }
+            command_list = [
+                arg for token in command["command"] for arg in subs.get(token, [str(token)])
+            ]
             self.__print_message("Generated command:", True)
-            Console().print(" ".join(command_list))
+            get_console().print(shlex.join(command_list))
             self.__print_message("Do you want to execute this command?", True)
-            choice = Console().input("[green]y/n: [/green]")
+            choice = get_console().input(get_prompt("[green]y/n: [/green]"))
             if choice == "y":
                 self.__print_message("Executing command...", True)
                 subprocess.run(command_list)
@@ -320,5 +429,10 @@ if __name__ == "__main__":
     else:
         print("Startup check failed.")
         sys.exit(1)
-    runner = Runner(startup_checker.get_config(), args)
+    runner = Runner(
+        startup_checker.get_config(),
+        args,
+        startup_checker.get_hash_map(),
+        startup_checker.get_command_hashes(),
+    )
     runner.run()